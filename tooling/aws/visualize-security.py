@@ -4,120 +4,424 @@ Generates Mermaid sequence diagrams for AWS network security configuration
 """
 
 import boto3
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+import hashlib
 import json
+import os
+import tempfile
+import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache, partial
+from itertools import chain, islice
+from operator import itemgetter
 import argparse
+import logging
+import sys
+
+log = logging.getLogger('secviz')
+
+# Sort key for NACL entries; RuleNumber is always present on AWS NACL entries
+_RULE_NUMBER = itemgetter('RuleNumber')
+
+# CIDRs that open a rule to the whole internet, matched as plain strings (no ip_network parsing)
+_INTERNET_NETS = frozenset({'0.0.0.0/0', '::/0'})
+
+# Security groups shown in the overview sequence diagram; more become unreadable
+_OVERVIEW_SG_LIMIT = 10
+
+# Translation tables turning AWS IDs and CIDRs into Mermaid-safe node IDs in one pass
+_CIDR_TABLE = str.maketrans({'.': '_', '/': '_'})
+_SGID_TABLE = str.maketrans({'-': '_'})
+
+# VPC endpoint service-name substrings and their display types, first match wins
+# ('ecr.api' must precede 'ecr', which also matches ecr.dkr)
+_SVC_MAP = (
+    ('s3', 'S3'),
+    ('ecr.api', 'ECR API'),
+    ('ecr', 'ECR'),
+    ('ec2', 'EC2'),
+    ('dynamodb', 'DynamoDB'),
+    ('logs', 'CloudWatch Logs'),
+    ('sns', 'SNS'),
+    ('sqs', 'SQS'),
+)
+
+# Mermaid node and edge templates, %-formatted in the diagram loops
+_SG_NODE = '        %s["SG: %s<br/>%s<br/>Ingress: %d | Egress: %d%s"]'
+_NACL_NODE = '        NACL_%s["NACL: %s<br/>%s<br/>Ingress: %d | Egress: %d"]'
+_CIDR_NODE = '    %s["CIDR: %s"]'
+_EDGE = '    %s -->|"%s"| %s'
+
+# Errors from AWS calls that a fetch helper reports and skips; anything else is a real bug
+_AWS_ERRORS = (ClientError, BotoCoreError)
+
+# Shared by every client: pool sized for the threaded fetches, adaptive backoff on throttling
+_CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    retries={'max_attempts': 10, 'mode': 'adaptive'},
+    tcp_keepalive=True,
+)
+
+
+@lru_cache(maxsize=None)
+def _get_session():
+    """Return the process-wide boto3 session, so credentials are resolved once"""
+    return boto3.session.Session()
+
+
+@lru_cache(maxsize=None)
+def _get_client(service, region):
+    """Return the boto3 client for a service and region, creating it on first use"""
+    return _get_session().client(service, region_name=region, config=_CLIENT_CONFIG)
+
+
+@lru_cache(maxsize=None)
+def _get_account_id(region):
+    """Return the AWS account ID of the active credentials, asking STS in region so every partition resolves"""
+    return _get_client('sts', region).get_caller_identity()['Account']
+
+
+@lru_cache(maxsize=256)
+def _fmt_port_pair(from_port, to_port):
+    """Format a from/to port pair, cached since the same pairs recur across SG and NACL rules"""
+    if from_port is None or to_port is None:
+        return "All Ports"
+    
+    if from_port == to_port:
+        return f"Port {from_port}"
+    else:
+        return f"Ports {from_port}-{to_port}"
+
+
+def _fmt_sg_ports(protocol, from_port, to_port):
+    """Format an SG rule's (protocol, FromPort, ToPort) for display"""
+    if protocol == '-1':
+        return "All Ports"
+    return _fmt_port_pair(from_port, to_port)
+
+
+class _RegionLog(logging.LoggerAdapter):
+    """Logger adapter that tags each message with its region, after the message's indentation"""
+    def process(self, msg, kwargs):
+        text = msg.lstrip(' ')
+        return f"{msg[:len(msg) - len(text)]}[{self.extra['region']}] {text}", kwargs
+
+
+def _emit(lines, out):
+    """Return lines joined into one string, or stream them to out one per line when out is given"""
+    if out is None:
+        return "\n".join(lines)
+    out.writelines(line + '\n' for line in lines)
+
 
 class SecurityVisualizer:
-    def __init__(self, region='us-east-1'):
-        self.ec2 = boto3.client('ec2', region_name=region)
-        try:
-            self.elbv2 = boto3.client('elbv2', region_name=region)
-        except:
-            self.elbv2 = None
-        try:
-            self.rds = boto3.client('rds', region_name=region)
-        except:
-            self.rds = None
-        try:
-            self.lambda_client = boto3.client('lambda', region_name=region)
-        except:
-            self.lambda_client = None
-        try:
-            self.ecs = boto3.client('ecs', region_name=region)
-        except:
-            self.ecs = None
-        try:
-            self.eks = boto3.client('eks', region_name=region)
-        except:
-            self.eks = None
+    def __init__(self, region='us-east-1', cache_ttl=0, max_workers=8):
         self.region = region
+        self.log = _RegionLog(log, {'region': region})  # Prefixes progress and warnings with the region
+        # Client construction is local and never calls AWS; failures surface on the calls themselves
+        self.ec2 = self._mk('ec2')
+        self.elbv2 = self._mk('elbv2')
+        self.rds = self._mk('rds')
+        self.lambda_client = self._mk('lambda')
+        self.ecs = self._mk('ecs')
+        self.eks = self._mk('eks')
+        self.elb = self._mk('elb')
+        self.cache_ttl = cache_ttl  # Seconds to reuse cached AWS responses; 0 disables the cache
+        self._cache_dir = None  # Resolved on first cache use, since it needs the account ID from STS
+        self.max_workers = max_workers  # Width of the thread pools that fan out AWS calls
         self.security_groups = {}
         self.nacls = {}
         self.vpcs = {}
         self.sg_to_components = defaultdict(list)  # Map SG ID to list of components
         self.components = {}  # Store component details
+        self._safe_id = {}  # Map SG/NACL/VPC ID to its Mermaid-safe form
+        self._sg_node = {}  # Map SG ID to Mermaid node ID
+        self._sg_name = {}  # Map SG ID to its GroupName (or ID)
+        self._component_names = {}  # Map SG ID to its formatted attached-component summary
+        self._vpc_name = {}  # Map VPC ID to its Name tag (or ID)
+        self._vpc_sgs = defaultdict(list)  # Map VPC ID to its SG IDs
+        self._vpc_nacls = defaultdict(list)  # Map VPC ID to its NACL IDs
+        self._vpc_subgraph = {}  # Map VPC ID to its Mermaid subgraph header line
+        self._nacl_partitions = {}  # Map NACL ID to its (ingress, egress) entries sorted by rule number
+        self._ingress_sg_refs = defaultdict(list)  # Map SG ID to (referenced SG, port range, protocol) ingress references
+        self._egress_sg_refs = defaultdict(list)  # Map SG ID to (referenced SG, port range, protocol) egress references
+        self._ingress_cidrs = defaultdict(list)  # Map SG ID to (CIDR, port range, protocol) ingress sources
+        self._egress_cidrs = defaultdict(list)  # Map SG ID to (CIDR, port range, protocol) egress destinations
+        self._sg_edges = []  # Deduplicated (source node, label, target node) SG references
+        self._ec2_instances_by_tag = defaultdict(list)  # Map EKS cluster name to its node instances
+        self._instance_names = {}  # Map instance ID to its Name tag (or ID)
         
+    def _mk(self, service):
+        """Return the shared client for a service in this visualizer's region"""
+        return _get_client(service, self.region)
+    
     def fetch_all_data(self):
         """Fetch all security groups, NACLs, VPCs, and components"""
-        print("Fetching AWS resources...")
-        
-        # Fetch VPCs
-        print("  - Fetching VPCs...")
-        vpc_response = self.ec2.describe_vpcs()
-        for vpc in vpc_response['Vpcs']:
-            self.vpcs[vpc['VpcId']] = vpc
-        
-        # Fetch Security Groups
-        print("  - Fetching Security Groups...")
-        sg_response = self.ec2.describe_security_groups()
-        for sg in sg_response['SecurityGroups']:
-            self.security_groups[sg['GroupId']] = sg
+        self.log.info("Fetching AWS resources...")
         
-        # Fetch Network ACLs
-        print("  - Fetching Network ACLs...")
-        nacl_response = self.ec2.describe_network_acls()
-        for nacl in nacl_response['NetworkAcls']:
-            self.nacls[nacl['NetworkAclId']] = nacl
+        # VPCs, Security Groups and NACLs are independent network-bound calls,
+        # so fetch them concurrently (boto3 clients are thread-safe for reads)
+        self.log.info("  - Fetching VPCs, Security Groups and Network ACLs...")
+        with ThreadPoolExecutor(max_workers=min(3, self.max_workers)) as executor:
+            futures = [executor.submit(fetch) for fetch in (
+                self._fetch_vpcs, self._fetch_security_groups, self._fetch_nacls)]
+            self.vpcs, self.security_groups, self.nacls = [f.result() for f in futures]
         
-        # Fetch components that use security groups
-        print("  - Fetching EC2 instances...")
-        self._fetch_ec2_instances()
+        self._fetch_components()
+        self._build_indexes()
         
-        print("  - Fetching Load Balancers...")
-        self._fetch_load_balancers()
+        self.log.info("  ✓ Found %d VPCs, %d Security Groups, %d NACLs", len(self.vpcs), len(self.security_groups), len(self.nacls))
+        self.log.info("  ✓ Found %d components attached to security groups", len(self.components))
+    
+    def fetch_flow_data(self, source_sg_id, target_sg_id):
+        """Fetch only the two security groups (and components) needed for a flow diagram"""
+        self.log.info("Fetching AWS resources...")
+        
+        # Filter server-side instead of scanning every SG; VPCs and NACLs are not needed.
+        # Errors (e.g. InvalidGroup.NotFound) propagate: without both SGs there is no flow to draw
+        self.log.info("  - Fetching Security Groups...")
+        response = self._call(self.ec2, 'describe_security_groups',
+                              GroupIds=list(dict.fromkeys([source_sg_id, target_sg_id])))
+        for sg in response['SecurityGroups']:
+            self.security_groups[sg['GroupId']] = sg
+        
+        self._fetch_components()
+        self._build_indexes()
+        
+        self.log.info("  ✓ Found %d Security Groups", len(self.security_groups))
+        self.log.info("  ✓ Found %d components attached to security groups", len(self.components))
+    
+    def _fetch_components(self):
+        """Fetch components that use security groups"""
+        # Each helper calls a different service and returns its own results, so run
+        # them concurrently and merge in submission order to keep output stable
+        self.log.info("  - Fetching EC2 instances, Load Balancers, RDS, Lambda, ECS, EKS and VPC Endpoints...")
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # Instances are listed once and shared by the EC2 and EKS helpers
+            instances = executor.submit(self._fetch_instances)
+            futures = [
+                executor.submit(self._fetch_ec2_instances, instances),
+                executor.submit(self._fetch_load_balancers),
+                executor.submit(self._fetch_rds_instances),
+                executor.submit(self._fetch_lambda_functions),
+                executor.submit(self._fetch_ecs_services),
+                executor.submit(self._fetch_eks_clusters, instances),
+                executor.submit(self._fetch_vpc_endpoints),
+            ]
+            for future in futures:
+                self._merge_components(self.components, self.sg_to_components, future.result())
+    
+    @staticmethod
+    def _merge_components(components, sg_to_components, result):
+        """Merge a helper's (components, sg_to_components) result into the given maps"""
+        result_components, result_sg_to_components = result
+        components.update(result_components)
+        for sg_id, sg_components in result_sg_to_components.items():
+            sg_to_components[sg_id].extend(sg_components)
+    
+    def _build_indexes(self):
+        """Precompute lookups reused by every diagram and report pass"""
+        self._sg_name = {sg_id: sg.get('GroupName', sg_id) for sg_id, sg in self.security_groups.items()}
+        self._build_sg_component_index()
+        self._vpc_name = {vpc_id: self._get_resource_name(vpc.get('Tags', []), vpc_id)
+                          for vpc_id, vpc in self.vpcs.items()}
         
-        print("  - Fetching RDS instances...")
-        self._fetch_rds_instances()
+        # Group security groups and NACLs by VPC, through locals rather than attributes
+        self._vpc_sgs = vpc_sgs = defaultdict(list)
+        for sg_id, sg in self.security_groups.items():
+            vpc_sgs[sg.get('VpcId', 'default')].append(sg_id)
+        self._vpc_nacls = vpc_nacls = defaultdict(list)
+        for nacl_id, nacl in self.nacls.items():
+            vpc_nacls[nacl.get('VpcId', 'default')].append(nacl_id)
         
-        print("  - Fetching Lambda functions...")
-        self._fetch_lambda_functions()
+        # Mermaid-safe ('-' -> '_') form of every SG, NACL and VPC ID the diagrams reference
+        self._safe_id = {resource_id: resource_id.translate(_SGID_TABLE)
+                         for resource_id in chain(self.security_groups, self.nacls, vpc_sgs, vpc_nacls)}
+        self._sg_node = {sg_id: 'SG_' + self._safe_id[sg_id] for sg_id in self.security_groups}
         
-        print("  - Fetching ECS services...")
-        self._fetch_ecs_services()
+        self._nacl_partitions = {nacl_id: self._partition_nacl_entries(nacl) for nacl_id, nacl in self.nacls.items()}
         
-        print("  - Fetching EKS clusters...")
-        self._fetch_eks_clusters()
+        # Both diagrams open the same subgraph per VPC, so format each header once
+        self._vpc_subgraph = {
+            vpc_id: f"    subgraph VPC_{self._safe_id[vpc_id]}[\"VPC: {self._vpc_name.get(vpc_id, vpc_id)}\"]"
+            for vpc_id in {**self._vpc_sgs, **self._vpc_nacls}
+        }
         
-        print("  - Fetching VPC Endpoints (S3, ECR)...")
-        self._fetch_vpc_endpoints()
+        # Walk every rule once, splitting it into SG references and CIDR ranges
+        # per direction so later passes never re-read IpPermissions
+        self._ingress_sg_refs = defaultdict(list)
+        self._egress_sg_refs = defaultdict(list)
+        self._ingress_cidrs = defaultdict(list)
+        self._egress_cidrs = defaultdict(list)
+        security_groups = self.security_groups
+        for sg_id, sg in security_groups.items():
+            for rules, sg_refs, cidrs in ((sg.get('IpPermissions', []), self._ingress_sg_refs, self._ingress_cidrs),
+                                          (sg.get('IpPermissionsEgress', []), self._egress_sg_refs, self._egress_cidrs)):
+                # Bind this SG's list appends once instead of per referenced group or range
+                add_ref = sg_refs[sg_id].append
+                add_cidr = cidrs[sg_id].append
+                for rule in rules:
+                    protocol, port_range = self._format_rule(rule)
+                    
+                    for user_id_group_pair in rule.get('UserIdGroupPairs', []):
+                        referenced_sg = user_id_group_pair.get('GroupId')
+                        if referenced_sg and referenced_sg in security_groups:
+                            add_ref((referenced_sg, port_range, protocol))
+                    
+                    for cidr in rule.get('IpRanges', []):
+                        add_cidr((cidr.get('CidrIp', ''), port_range, protocol))
         
-        print(f"  ✓ Found {len(self.vpcs)} VPCs, {len(self.security_groups)} Security Groups, {len(self.nacls)} NACLs")
-        print(f"  ✓ Found {len(self.components)} components attached to security groups")
+        # Flatten SG-to-SG references into diagram edges. Ingress references point
+        # at the SG, egress references point away from it; the same
+        # (source, target, ports) edge seen from both sides is kept once.
+        self._sg_edges = []
+        add_edge = self._sg_edges.append
+        seen_edges = set()
+        for sg_id in security_groups:
+            for sg_refs, inbound in ((self._ingress_sg_refs, True), (self._egress_sg_refs, False)):
+                for referenced_sg, port_range, _ in sg_refs.get(sg_id, ()):
+                    source, target = (referenced_sg, sg_id) if inbound else (sg_id, referenced_sg)
+                    key = (source, target, port_range)
+                    if key in seen_edges:
+                        continue
+                    seen_edges.add(key)
+                    
+                    # Always label with the source SG's components, so the label depends only
+                    # on the edge and not on which side's rule was seen first
+                    source_components = self._component_names.get(source)
+                    label = f"{source_components}<br/>{port_range}" if source_components else port_range
+                    add_edge((self._sg_node[source], label, self._sg_node[target]))
+    
+    def _call(self, client, method, **kwargs):
+        """Call a client method, served from the disk cache when cache_ttl is set"""
+        call = partial(getattr(client, method), **kwargs)
+        return self._cached(client, method, call, kwargs) if self.cache_ttl else call()
     
-    def _fetch_ec2_instances(self):
-        """Fetch EC2 instances and map to security groups"""
+    def _paginate(self, client, method, page_size, **kwargs):
+        """Iterate the pages of a paginated call, fully materialized when cached"""
+        pages = partial(client.get_paginator(method).paginate,
+                        PaginationConfig={'PageSize': page_size}, **kwargs)
+        if not self.cache_ttl:
+            return pages()
+        return self._cached(client, method, lambda: list(pages()), kwargs)
+    
+    def _get_cache_dir(self):
+        """Return this region's cache directory, looking up the account ID on first use"""
+        if self._cache_dir is None:
+            # Partition by account so switching profiles or credentials never serves another account's data
+            self._cache_dir = os.path.join(os.path.expanduser('~/.cache/aws-secviz'),
+                                           _get_account_id(self.region), self.region)
+        return self._cache_dir
+    
+    def _cached(self, client, method, fetch, kwargs):
+        """Return a response younger than cache_ttl from disk, otherwise fetch and store it"""
+        service = client.meta.service_model.service_name
+        key = json.dumps([method, sorted(kwargs.items())], default=str)
+        cache_dir = self._get_cache_dir()
+        path = os.path.join(cache_dir, f"{service}.{method}.{hashlib.sha1(key.encode()).hexdigest()}.json")
         try:
-            response = self.ec2.describe_instances()
-            for reservation in response.get('Reservations', []):
-                for instance in reservation.get('Instances', []):
-                    instance_id = instance['InstanceId']
-                    instance_name = self._get_resource_name(instance.get('Tags', []), instance_id)
-                    instance_type = instance.get('InstanceType', 'unknown')
-                    
-                    component = {
-                        'type': 'EC2',
-                        'id': instance_id,
-                        'name': instance_name,
-                        'details': f"{instance_type} Instance"
-                    }
-                    self.components[instance_id] = component
-                    
-                    # Map security groups to this instance
-                    for sg in instance.get('SecurityGroups', []):
-                        sg_id = sg['GroupId']
-                        self.sg_to_components[sg_id].append(component)
+            if os.path.getmtime(path) > time.time() - self.cache_ttl:
+                with open(path, encoding='utf-8') as f:
+                    return json.load(f)
+        except (OSError, ValueError):
+            pass  # Missing, unreadable or corrupt entries are simply refetched
+        
+        result = fetch()
+        
+        # Write to a temp file and rename so concurrent runs never read a partial entry
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(result, f, default=str)
+            os.replace(tmp_path, path)
         except Exception as e:
-            print(f"    Warning: Could not fetch EC2 instances: {e}")
+            self.log.warning("    Warning: Could not write cache entry %s: %s", path, e)
+        return result
+    
+    def _fetch_vpcs(self):
+        """Fetch all VPCs keyed by VPC ID"""
+        vpcs = {}
+        for page in self._paginate(self.ec2, 'describe_vpcs', 1000):
+            for vpc in page['Vpcs']:
+                vpcs[vpc['VpcId']] = vpc
+        return vpcs
+    
+    def _fetch_security_groups(self):
+        """Fetch all security groups keyed by group ID"""
+        security_groups = {}
+        for page in self._paginate(self.ec2, 'describe_security_groups', 1000):
+            for sg in page['SecurityGroups']:
+                security_groups[sg['GroupId']] = sg
+        return security_groups
+    
+    def _fetch_nacls(self):
+        """Fetch all Network ACLs keyed by NACL ID"""
+        nacls = {}
+        for page in self._paginate(self.ec2, 'describe_network_acls', 1000):
+            for nacl in page['NetworkAcls']:
+                nacls[nacl['NetworkAclId']] = nacl
+        return nacls
+    
+    def _fetch_instances(self):
+        """List live EC2 instances and index their names and EKS cluster tags"""
+        instances = []
+        self._ec2_instances_by_tag = defaultdict(list)
+        self._instance_names = {}
+        try:
+            for page in self._paginate(
+                self.ec2, 'describe_instances', 1000,
+                Filters=[{'Name': 'instance-state-name', 'Values': ['running', 'stopped', 'pending']}]
+            ):
+                for reservation in page.get('Reservations', []):
+                    instances.extend(reservation.get('Instances', []))
+        except _AWS_ERRORS as e:
+            self.log.warning("    Warning: Could not fetch EC2 instances: %s", e)
+        
+        # Read both tags in one scan so later passes never walk the tag lists again
+        for instance in instances:
+            instance_id = instance['InstanceId']
+            tags = {tag.get('Key'): tag.get('Value') for tag in instance.get('Tags') or ()}
+            self._instance_names[instance_id] = tags.get('Name', instance_id)
+            cluster_name = tags.get('eks:cluster-name')
+            if cluster_name:
+                self._ec2_instances_by_tag[cluster_name].append(instance)
+        return instances
+    
+    def _fetch_ec2_instances(self, instances):
+        """Map EC2 instances (a future of the shared listing) to security groups"""
+        components = {}
+        sg_to_components = defaultdict(list)
+        for instance in instances.result():
+            instance_id = instance['InstanceId']
+            instance_name = self._instance_names[instance_id]
+            instance_type = instance.get('InstanceType', 'unknown')
+            
+            component = {
+                'type': 'EC2',
+                'id': instance_id,
+                'name': instance_name,
+                'details': f"{instance_type} Instance"
+            }
+            components[instance_id] = component
+            
+            # Map security groups to this instance
+            for sg in instance.get('SecurityGroups', []):
+                sg_id = sg['GroupId']
+                sg_to_components[sg_id].append(component)
+        
+        return components, sg_to_components
     
     def _fetch_load_balancers(self):
         """Fetch Load Balancers (ALB, NLB, CLB) and map to security groups"""
-        if not self.elbv2:
-            return
+        components = {}
+        sg_to_components = defaultdict(list)
         try:
             # Application and Network Load Balancers
-            response = self.elbv2.describe_load_balancers()
+            response = self._call(self.elbv2, 'describe_load_balancers')
             for lb in response.get('LoadBalancers', []):
                 lb_arn = lb['LoadBalancerArn']
                 lb_name = lb.get('LoadBalancerName', lb_arn.split('/')[-1])
@@ -129,20 +433,19 @@ class SecurityVisualizer:
                     'name': lb_name,
                     'details': f"{lb_type} Load Balancer"
                 }
-                self.components[lb_arn] = component
+                components[lb_arn] = component
                 
                 # Get security groups for ALB/NLB (they're in the load balancer description)
                 for sg_id in lb.get('SecurityGroups', []):
-                    self.sg_to_components[sg_id].append(component)
-        except Exception as e:
+                    sg_to_components[sg_id].append(component)
+        except _AWS_ERRORS as e:
             # ELBv2 might not be available
             if 'elbv2' not in str(e).lower():
-                print(f"    Warning: Could not fetch Load Balancers: {e}")
+                self.log.warning("    Warning: Could not fetch Load Balancers: %s", e)
         
         try:
             # Classic Load Balancers
-            elb = boto3.client('elb', region_name=self.region)
-            response = elb.describe_load_balancers()
+            response = self._call(self.elb, 'describe_load_balancers')
             for lb in response.get('LoadBalancerDescriptions', []):
                 lb_name = lb['LoadBalancerName']
                 
@@ -152,19 +455,21 @@ class SecurityVisualizer:
                     'name': lb_name,
                     'details': 'Classic Load Balancer'
                 }
-                self.components[lb_name] = component
+                components[lb_name] = component
                 
                 for sg_id in lb.get('SecurityGroups', []):
-                    self.sg_to_components[sg_id].append(component)
-        except Exception as e:
-            print(f"    Warning: Could not fetch Classic Load Balancers: {e}")
+                    sg_to_components[sg_id].append(component)
+        except _AWS_ERRORS as e:
+            self.log.warning("    Warning: Could not fetch Classic Load Balancers: %s", e)
+        
+        return components, sg_to_components
     
     def _fetch_rds_instances(self):
         """Fetch RDS instances and map to security groups"""
-        if not self.rds:
-            return
+        components = {}
+        sg_to_components = defaultdict(list)
         try:
-            response = self.rds.describe_db_instances()
+            response = self._call(self.rds, 'describe_db_instances')
             for db in response.get('DBInstances', []):
                 db_id = db['DBInstanceIdentifier']
                 db_engine = db.get('Engine', 'unknown')
@@ -175,21 +480,22 @@ class SecurityVisualizer:
                     'name': db_id,
                     'details': f"{db_engine} Database"
                 }
-                self.components[db_id] = component
+                components[db_id] = component
                 
                 for sg in db.get('VpcSecurityGroups', []):
                     sg_id = sg['VpcSecurityGroupId']
-                    self.sg_to_components[sg_id].append(component)
-        except Exception as e:
-            print(f"    Warning: Could not fetch RDS instances: {e}")
+                    sg_to_components[sg_id].append(component)
+        except _AWS_ERRORS as e:
+            self.log.warning("    Warning: Could not fetch RDS instances: %s", e)
+        
+        return components, sg_to_components
     
     def _fetch_lambda_functions(self):
         """Fetch Lambda functions with VPC configuration"""
-        if not self.lambda_client:
-            return
+        components = {}
+        sg_to_components = defaultdict(list)
         try:
-            paginator = self.lambda_client.get_paginator('list_functions')
-            for page in paginator.paginate():
+            for page in self._paginate(self.lambda_client, 'list_functions', 50):
                 for func in page.get('Functions', []):
                     func_name = func['FunctionName']
                     vpc_config = func.get('VpcConfig')
@@ -201,187 +507,210 @@ class SecurityVisualizer:
                             'name': func_name,
                             'details': 'Lambda Function'
                         }
-                        self.components[func_name] = component
+                        components[func_name] = component
                         
                         for sg_id in vpc_config['SecurityGroupIds']:
-                            self.sg_to_components[sg_id].append(component)
-        except Exception as e:
-            print(f"    Warning: Could not fetch Lambda functions: {e}")
+                            sg_to_components[sg_id].append(component)
+        except _AWS_ERRORS as e:
+            self.log.warning("    Warning: Could not fetch Lambda functions: %s", e)
+        
+        return components, sg_to_components
     
     def _fetch_ecs_services(self):
         """Fetch ECS services and tasks with security groups"""
-        if not self.ecs:
-            return
+        components = {}
+        sg_to_components = defaultdict(list)
         try:
             # List all clusters
-            cluster_response = self.ecs.list_clusters()
+            cluster_response = self._call(self.ecs, 'list_clusters')
             cluster_arns = cluster_response.get('clusterArns', [])
             
-            for cluster_arn in cluster_arns:
-                cluster_name = cluster_arn.split('/')[-1]
-                
-                # Get cluster details
+            # Clusters are independent, so process them concurrently and merge in order.
+            # Small accounts with a single cluster skip the pool and its thread start-up.
+            if len(cluster_arns) > 1:
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    results = list(executor.map(self._process_ecs_cluster, cluster_arns))
+            else:
+                results = [self._process_ecs_cluster(cluster_arn) for cluster_arn in cluster_arns]
+            for result in results:
+                self._merge_components(components, sg_to_components, result)
+        except _AWS_ERRORS as e:
+            self.log.warning("    Warning: Could not fetch ECS services: %s", e)
+        
+        return components, sg_to_components
+    
+    def _process_ecs_cluster(self, cluster_arn):
+        """Fetch services and tasks for one ECS cluster, describing batches concurrently"""
+        components = {}
+        sg_to_components = defaultdict(list)
+        cluster_name = cluster_arn.split('/')[-1]
+        
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            # List services in cluster and describe them in batches of 10
+            service_batches = []
+            try:
+                services_response = self._call(self.ecs, 'list_services', cluster=cluster_arn)
+                service_arns = services_response.get('serviceArns', [])
+                service_batches = [
+                    executor.submit(self._call, self.ecs, 'describe_services', cluster=cluster_arn, services=service_arns[i:i+10])
+                    for i in range(0, len(service_arns), 10)
+                ]
+            except _AWS_ERRORS as e:
+                self.log.warning("    Warning: Could not list ECS services in %s: %s", cluster_name, e)
+            
+            # Also check tasks for security groups (Fargate tasks), in batches of 100
+            task_batches = []
+            try:
+                tasks_response = self._call(self.ecs, 'list_tasks', cluster=cluster_arn)
+                task_arns = tasks_response.get('taskArns', [])
+                task_batches = [
+                    executor.submit(self._call, self.ecs, 'describe_tasks', cluster=cluster_arn, tasks=task_arns[i:i+100])
+                    for i in range(0, len(task_arns), 100)
+                ]
+            except _AWS_ERRORS as e:
+                pass  # Tasks might not be available
+            
+            for future in service_batches:
                 try:
-                    cluster_details = self.ecs.describe_clusters(clusters=[cluster_arn])
-                    cluster_info = cluster_details.get('clusters', [{}])[0]
-                except:
-                    cluster_info = {}
+                    services_details = future.result()
+                except _AWS_ERRORS as e:
+                    self.log.warning("    Warning: Could not fetch ECS service details: %s", e)
+                    continue
                 
-                # List services in cluster
-                try:
-                    services_response = self.ecs.list_services(cluster=cluster_arn)
-                    service_arns = services_response.get('serviceArns', [])
+                for service in services_details.get('services', []):
+                    service_name = service.get('serviceName', 'unknown')
+                    service_id = f"{cluster_name}/{service_name}"
                     
-                    # Describe services (batch of 10)
-                    for i in range(0, len(service_arns), 10):
-                        batch = service_arns[i:i+10]
-                        try:
-                            services_details = self.ecs.describe_services(
-                                cluster=cluster_arn,
-                                services=batch
-                            )
-                            
-                            for service in services_details.get('services', []):
-                                service_name = service.get('serviceName', 'unknown')
-                                service_id = f"{cluster_name}/{service_name}"
-                                
-                                component = {
-                                    'type': 'ECS',
-                                    'id': service_id,
-                                    'name': service_name,
-                                    'details': f"ECS Service in {cluster_name}"
-                                }
-                                self.components[service_id] = component
-                                
-                                # Get security groups from network configuration
-                                network_config = service.get('networkConfiguration', {})
-                                awsvpc_config = network_config.get('awsvpcConfiguration', {})
-                                security_groups = awsvpc_config.get('securityGroups', [])
-                                
-                                for sg_id in security_groups:
-                                    self.sg_to_components[sg_id].append(component)
-                        except Exception as e:
-                            print(f"    Warning: Could not fetch ECS service details: {e}")
-                except Exception as e:
-                    print(f"    Warning: Could not list ECS services in {cluster_name}: {e}")
-                
-                # Also check tasks for security groups (Fargate tasks)
+                    component = {
+                        'type': 'ECS',
+                        'id': service_id,
+                        'name': service_name,
+                        'details': f"ECS Service in {cluster_name}"
+                    }
+                    components[service_id] = component
+                    
+                    # Get security groups from network configuration
+                    network_config = service.get('networkConfiguration', {})
+                    awsvpc_config = network_config.get('awsvpcConfiguration', {})
+                    security_groups = awsvpc_config.get('securityGroups', [])
+                    
+                    for sg_id in security_groups:
+                        sg_to_components[sg_id].append(component)
+            
+            for future in task_batches:
                 try:
-                    tasks_response = self.ecs.list_tasks(cluster=cluster_arn)
-                    task_arns = tasks_response.get('taskArns', [])
+                    tasks_details = future.result()
+                except _AWS_ERRORS as e:
+                    self.log.warning("    Warning: Could not fetch ECS task details: %s", e)
+                    continue
+                
+                for task in tasks_details.get('tasks', []):
+                    task_id = task.get('taskArn', '').split('/')[-1]
+                    task_def_arn = task.get('taskDefinitionArn', '')
                     
-                    # Describe tasks (batch of 100)
-                    for i in range(0, len(task_arns), 100):
-                        batch = task_arns[i:i+100]
-                        try:
-                            tasks_details = self.ecs.describe_tasks(
-                                cluster=cluster_arn,
-                                tasks=batch
-                            )
-                            
-                            for task in tasks_details.get('tasks', []):
-                                task_id = task.get('taskArn', '').split('/')[-1]
-                                task_def_arn = task.get('taskDefinitionArn', '')
-                                
-                                # Get security groups from task attachments
-                                attachments = task.get('attachments', [])
-                                for attachment in attachments:
-                                    if attachment.get('type') == 'ElasticNetworkInterface':
-                                        details = attachment.get('details', [])
-                                        for detail in details:
-                                            if detail.get('name') == 'securityGroups':
-                                                sg_ids = detail.get('value', '').split(',')
-                                                component = {
-                                                    'type': 'ECS',
-                                                    'id': f"{cluster_name}/task-{task_id}",
-                                                    'name': f"Task-{task_id[:8]}",
-                                                    'details': f"ECS Task in {cluster_name}"
-                                                }
-                                                self.components[f"{cluster_name}/task-{task_id}"] = component
-                                                
-                                                for sg_id in sg_ids:
-                                                    if sg_id:
-                                                        self.sg_to_components[sg_id].append(component)
-                        except Exception as e:
-                            print(f"    Warning: Could not fetch ECS task details: {e}")
-                except Exception as e:
-                    pass  # Tasks might not be available
-        except Exception as e:
-            print(f"    Warning: Could not fetch ECS services: {e}")
+                    # Get security groups from task attachments
+                    attachments = task.get('attachments', [])
+                    for attachment in attachments:
+                        if attachment.get('type') == 'ElasticNetworkInterface':
+                            details = attachment.get('details', [])
+                            for detail in details:
+                                if detail.get('name') == 'securityGroups':
+                                    sg_ids = detail.get('value', '').split(',')
+                                    component = {
+                                        'type': 'ECS',
+                                        'id': f"{cluster_name}/task-{task_id}",
+                                        'name': f"Task-{task_id[:8]}",
+                                        'details': f"ECS Task in {cluster_name}"
+                                    }
+                                    components[f"{cluster_name}/task-{task_id}"] = component
+                                    
+                                    for sg_id in sg_ids:
+                                        if sg_id:
+                                            sg_to_components[sg_id].append(component)
+        
+        return components, sg_to_components
     
-    def _fetch_eks_clusters(self):
+    def _fetch_eks_clusters(self, instances):
         """Fetch EKS clusters and node groups with security groups"""
-        if not self.eks:
-            return
+        components = {}
+        sg_to_components = defaultdict(list)
         try:
             # List all clusters
-            cluster_response = self.eks.list_clusters()
+            cluster_response = self._call(self.eks, 'list_clusters')
             cluster_names = cluster_response.get('clusters', [])
             
-            for cluster_name in cluster_names:
-                try:
-                    # Get cluster details
-                    cluster_details = self.eks.describe_cluster(name=cluster_name)
-                    cluster_info = cluster_details.get('cluster', {})
-                    
-                    component = {
-                        'type': 'EKS',
-                        'id': cluster_name,
-                        'name': cluster_name,
-                        'details': 'EKS Cluster'
-                    }
-                    self.components[f"eks-{cluster_name}"] = component
-                    
-                    # Get security groups from cluster resources VPC config
-                    resources_vpc_config = cluster_info.get('resourcesVpcConfig', {})
-                    cluster_security_groups = resources_vpc_config.get('securityGroupIds', [])
-                    
-                    for sg_id in cluster_security_groups:
-                        self.sg_to_components[sg_id].append(component)
-                    
-                    # List and describe node groups
+            # Describe every cluster and list its node groups concurrently up front;
+            # the loop below then only consumes results in cluster order
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                cluster_info_by_name = {
+                    name: executor.submit(self._call, self.eks, 'describe_cluster', name=name) for name in cluster_names
+                }
+                node_groups_by_name = {
+                    name: executor.submit(self._call, self.eks, 'list_nodegroups', clusterName=name) for name in cluster_names
+                }
+                
+                for cluster_name in cluster_names:
                     try:
-                        node_groups_response = self.eks.list_nodegroups(clusterName=cluster_name)
-                        node_group_names = node_groups_response.get('nodegroups', [])
+                        # Get cluster details
+                        cluster_details = cluster_info_by_name[cluster_name].result()
+                        cluster_info = cluster_details.get('cluster', {})
                         
-                        for node_group_name in node_group_names:
-                            try:
-                                node_group_details = self.eks.describe_nodegroup(
-                                    clusterName=cluster_name,
-                                    nodegroupName=node_group_name
-                                )
-                                node_group_info = node_group_details.get('nodegroup', {})
-                                
-                                component = {
-                                    'type': 'EKS',
-                                    'id': f"{cluster_name}/{node_group_name}",
-                                    'name': node_group_name,
-                                    'details': f"EKS Node Group in {cluster_name}"
-                                }
-                                self.components[f"eks-{cluster_name}-{node_group_name}"] = component
-                                
-                                # EKS node groups don't directly expose security groups in the API
-                                # We'll get them from EC2 instances that are part of the node group
-                                # (handled in the EC2 instance fetch below)
-                                
-                            except Exception as e:
-                                print(f"    Warning: Could not fetch EKS node group {node_group_name}: {e}")
-                    except Exception as e:
-                        print(f"    Warning: Could not list EKS node groups: {e}")
-                    
-                    # Also check EC2 instances that might be part of EKS (tagged with cluster name)
-                    # This helps identify node group security groups
-                    try:
-                        instances_response = self.ec2.describe_instances(
-                            Filters=[
-                                {'Name': 'tag:eks:cluster-name', 'Values': [cluster_name]},
-                                {'Name': 'instance-state-name', 'Values': ['running', 'stopped']}
+                        component = {
+                            'type': 'EKS',
+                            'id': cluster_name,
+                            'name': cluster_name,
+                            'details': 'EKS Cluster'
+                        }
+                        components[f"eks-{cluster_name}"] = component
+                        
+                        # Get security groups from cluster resources VPC config
+                        resources_vpc_config = cluster_info.get('resourcesVpcConfig', {})
+                        cluster_security_groups = resources_vpc_config.get('securityGroupIds', [])
+                        
+                        for sg_id in cluster_security_groups:
+                            sg_to_components[sg_id].append(component)
+                        
+                        # List and describe node groups; node names below fall back to 'Node'
+                        # when the cluster has none or they cannot be listed
+                        node_group_name = None
+                        try:
+                            node_groups_response = node_groups_by_name[cluster_name].result()
+                            node_group_names = node_groups_response.get('nodegroups', [])
+                            node_group_futures = [
+                                executor.submit(self._call, self.eks, 'describe_nodegroup',
+                                                clusterName=cluster_name, nodegroupName=node_group_name)
+                                for node_group_name in node_group_names
                             ]
-                        )
-                        for reservation in instances_response.get('Reservations', []):
-                            for instance in reservation.get('Instances', []):
+                            
+                            for node_group_name, node_group_future in zip(node_group_names, node_group_futures):
+                                try:
+                                    node_group_details = node_group_future.result()
+                                    node_group_info = node_group_details.get('nodegroup', {})
+                                    
+                                    component = {
+                                        'type': 'EKS',
+                                        'id': f"{cluster_name}/{node_group_name}",
+                                        'name': node_group_name,
+                                        'details': f"EKS Node Group in {cluster_name}"
+                                    }
+                                    components[f"eks-{cluster_name}-{node_group_name}"] = component
+                                    
+                                    # EKS node groups don't directly expose security groups in the API
+                                    # We'll get them from EC2 instances that are part of the node group
+                                    # (handled in the EC2 instance fetch below)
+                                    
+                                except _AWS_ERRORS as e:
+                                    self.log.warning("    Warning: Could not fetch EKS node group %s: %s", node_group_name, e)
+                        except _AWS_ERRORS as e:
+                            self.log.warning("    Warning: Could not list EKS node groups: %s", e)
+                        
+                        # Also check EC2 instances that might be part of EKS (tagged with cluster name)
+                        # This helps identify node group security groups. They come from the
+                        # shared instance listing instead of a describe_instances call per cluster.
+                        try:
+                            instances.result()
+                            for instance in self._ec2_instances_by_tag.get(cluster_name, []):
                                 instance_id = instance['InstanceId']
-                                instance_name = self._get_resource_name(instance.get('Tags', []), instance_id)
                                 
                                 component = {
                                     'type': 'EKS',
@@ -389,26 +718,29 @@ class SecurityVisualizer:
                                     'name': f"{node_group_name or 'Node'}-{instance_id[:8]}",
                                     'details': f"EKS Node in {cluster_name}"
                                 }
-                                self.components[f"eks-{cluster_name}-{instance_id}"] = component
+                                components[f"eks-{cluster_name}-{instance_id}"] = component
                                 
                                 # Map security groups
                                 for sg in instance.get('SecurityGroups', []):
                                     sg_id = sg['GroupId']
-                                    self.sg_to_components[sg_id].append(component)
-                    except Exception as e:
-                        pass  # EC2 instances might not be tagged or accessible
-                        
-                except Exception as e:
-                    print(f"    Warning: Could not fetch EKS cluster {cluster_name}: {e}")
-        except Exception as e:
-            print(f"    Warning: Could not fetch EKS clusters: {e}")
+                                    sg_to_components[sg_id].append(component)
+                        except _AWS_ERRORS as e:
+                            pass  # EC2 instances might not be tagged or accessible
+                            
+                    except _AWS_ERRORS as e:
+                        self.log.warning("    Warning: Could not fetch EKS cluster %s: %s", cluster_name, e)
+        except _AWS_ERRORS as e:
+            self.log.warning("    Warning: Could not fetch EKS clusters: %s", e)
+        
+        return components, sg_to_components
     
     def _fetch_vpc_endpoints(self):
         """Fetch VPC Endpoints (S3, ECR, etc.) and map to security groups"""
+        components = {}
+        sg_to_components = defaultdict(list)
         try:
             # Describe VPC endpoints
-            paginator = self.ec2.get_paginator('describe_vpc_endpoints')
-            for page in paginator.paginate():
+            for page in self._paginate(self.ec2, 'describe_vpc_endpoints', 1000):
                 for endpoint in page.get('VpcEndpoints', []):
                     endpoint_id = endpoint['VpcEndpointId']
                     endpoint_type = endpoint.get('VpcEndpointType', 'Gateway')
@@ -416,28 +748,9 @@ class SecurityVisualizer:
                     
                     # Extract service type from service name
                     # Format: com.amazonaws.region.service-name
-                    service_type = 'Unknown'
-                    if 's3' in service_name.lower():
-                        service_type = 'S3'
-                    elif 'ecr' in service_name.lower() or 'ecr-dkr' in service_name.lower():
-                        service_type = 'ECR'
-                    elif 'ecr.api' in service_name.lower():
-                        service_type = 'ECR API'
-                    elif 'ec2' in service_name.lower():
-                        service_type = 'EC2'
-                    elif 'dynamodb' in service_name.lower():
-                        service_type = 'DynamoDB'
-                    elif 'logs' in service_name.lower():
-                        service_type = 'CloudWatch Logs'
-                    elif 'sns' in service_name.lower():
-                        service_type = 'SNS'
-                    elif 'sqs' in service_name.lower():
-                        service_type = 'SQS'
-                    else:
-                        # Extract from service name
-                        parts = service_name.split('.')
-                        if len(parts) > 0:
-                            service_type = parts[-1].replace('-', ' ').title()
+                    sn = service_name.lower()
+                    service_type = next((label for key, label in _SVC_MAP if key in sn),
+                                        service_name.split('.')[-1].replace('-', ' ').title())
                     
                     endpoint_name = self._get_resource_name(endpoint.get('Tags', []), endpoint_id)
                     
@@ -450,13 +763,13 @@ class SecurityVisualizer:
                             'name': endpoint_name,
                             'details': f"{service_type} VPC Endpoint"
                         }
-                        self.components[endpoint_id] = component
+                        components[endpoint_id] = component
                         
                         # Map security groups from endpoint
                         for sg in endpoint.get('Groups', []):
                             sg_id = sg.get('GroupId')
                             if sg_id:
-                                self.sg_to_components[sg_id].append(component)
+                                sg_to_components[sg_id].append(component)
                     elif endpoint_type == 'Gateway':
                         # Gateway endpoints don't use security groups, but we can still track them
                         # They're important for understanding network architecture
@@ -466,443 +779,468 @@ class SecurityVisualizer:
                             'name': endpoint_name,
                             'details': f"{service_type} Gateway Endpoint (no SG)"
                         }
-                        self.components[endpoint_id] = component
+                        components[endpoint_id] = component
                         # Note: Gateway endpoints don't have security groups
-        except Exception as e:
-            print(f"    Warning: Could not fetch VPC Endpoints: {e}")
+        except _AWS_ERRORS as e:
+            self.log.warning("    Warning: Could not fetch VPC Endpoints: %s", e)
+        
+        return components, sg_to_components
     
     def _get_resource_name(self, tags, default_id):
         """Extract Name tag from resource tags"""
-        for tag in tags:
+        for tag in tags or ():
             if tag.get('Key') == 'Name':
                 return tag.get('Value', default_id)
         return default_id
     
-    def _is_internet_cidr(self, cidr):
-        """Check if CIDR represents internet/public access"""
-        if not cidr:
-            return False
-        cidr_ip = cidr if isinstance(cidr, str) else cidr.get('CidrIp', '')
-        return cidr_ip == '0.0.0.0/0' or cidr_ip.startswith('0.0.0.0')
-    
-    def _get_component_name(self, sg_id):
-        """Get component names attached to a security group"""
-        components = self.sg_to_components.get(sg_id, [])
-        if not components:
-            return None
-        
-        # Group by type
-        by_type = defaultdict(list)
-        for comp in components:
-            by_type[comp['type']].append(comp['name'])
-        
-        # Format component list
-        parts = []
-        for comp_type, names in by_type.items():
-            if len(names) == 1:
-                parts.append(f"{comp_type}: {names[0]}")
-            else:
-                parts.append(f"{comp_type}: {names[0]} (+{len(names)-1})")
-        
-        return ", ".join(parts) if parts else None
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _is_internet_cidr(cidr_ip):
+        """Check if a CIDR string represents internet/public access, cached per distinct CIDR"""
+        return cidr_ip in _INTERNET_NETS or cidr_ip.startswith('0.0.0.0')
     
-    def generate_security_groups_diagram(self):
-        """Generate Mermaid diagram for Security Groups"""
-        mermaid = ["```mermaid", "graph TB"]
-        
-        # Group security groups by VPC
-        vpc_sgs = defaultdict(list)
-        for sg_id, sg in self.security_groups.items():
-            vpc_id = sg.get('VpcId', 'default')
-            vpc_sgs[vpc_id].append(sg_id)
+    def _build_sg_component_index(self):
+        """Format the attached-component summary of every SG in one pass over the components"""
+        self._component_names = {}
+        for sg_id, components in self.sg_to_components.items():
+            if not components:
+                continue
+            
+            # Group by type
+            by_type = defaultdict(list)
+            for comp in components:
+                by_type[comp['type']].append(comp['name'])
+            
+            # Format component list
+            parts = []
+            for comp_type, names in by_type.items():
+                if len(names) == 1:
+                    parts.append(f"{comp_type}: {names[0]}")
+                else:
+                    parts.append(f"{comp_type}: {names[0]} (+{len(names)-1})")
+            
+            self._component_names[sg_id] = ", ".join(parts)
+    
+    def generate_security_groups_diagram(self, out=None):
+        """Generate Mermaid diagram for Security Groups, streamed to out if given, else returned"""
+        return _emit(self._iter_security_groups_diagram(), out)
+    
+    def _iter_security_groups_diagram(self):
+        """Yield the Security Groups diagram one line (or VPC subgraph block) at a time"""
+        yield "```mermaid"
+        yield "graph TB"
         
-        # Create nodes for each VPC
-        for vpc_id, sg_ids in vpc_sgs.items():
-            vpc_name = self.vpcs.get(vpc_id, {}).get('Tags', [{}])[0].get('Value', vpc_id) if vpc_id in self.vpcs else vpc_id
-            mermaid.append(f"    subgraph VPC_{vpc_id.replace('-', '_')}[\"VPC: {vpc_name}\"]")
+        # Create nodes for each VPC, yielding each subgraph as a single block
+        for vpc_id, sg_ids in self._vpc_sgs.items():
+            block = [self._vpc_subgraph[vpc_id]]
             
             for sg_id in sg_ids:
                 sg = self.security_groups[sg_id]
-                sg_name = sg.get('GroupName', sg_id)
-                description = sg.get('Description', '').replace('"', "'")
+                sg_name = self._sg_name[sg_id]
                 
                 # Count rules
                 ingress_count = len(sg.get('IpPermissions', []))
                 egress_count = len(sg.get('IpPermissionsEgress', []))
                 
                 # Get attached components
-                component_info = self._get_component_name(sg_id)
+                component_info = self._component_names.get(sg_id)
                 component_text = f"<br/>Attached: {component_info}" if component_info else ""
                 
-                mermaid.append(f"        SG_{sg_id.replace('-', '_')}[\"SG: {sg_name}<br/>{sg_id}<br/>Ingress: {ingress_count} | Egress: {egress_count}{component_text}\"]")
+                block.append(_SG_NODE % (self._sg_node[sg_id], sg_name, sg_id, ingress_count, egress_count, component_text))
             
-            mermaid.append("    end")
+            block.append("    end")
+            yield "\n".join(block)
         
         # Add Internet/User node
-        mermaid.append("    Internet[\"Internet/User\"]")
-        mermaid.append("")
+        yield "    Internet[\"Internet/User\"]"
+        yield ""
         
         # Add connections based on security group references
-        mermaid.append("    %% Security Group References")
-        for sg_id, sg in self.security_groups.items():
-            sg_name = sg_id.replace('-', '_')
-            
-            # Check ingress rules for SG references and CIDR blocks
-            for rule in sg.get('IpPermissions', []):
-                port_range = self._format_port_range(rule)
-                protocol = rule.get('IpProtocol', '-1')
-                
-                # Check for CIDR blocks (Internet/User)
-                for cidr in rule.get('IpRanges', []):
-                    cidr_ip = cidr.get('CidrIp', '')
-                    if self._is_internet_cidr(cidr_ip):
-                        mermaid.append(f"    Internet -->|\"{protocol} {port_range}\"| SG_{sg_name}")
-                    else:
-                        # Specific CIDR - show as source
-                        source_name = f"CIDR: {cidr_ip}"
-                        mermaid.append(f"    CIDR_{cidr_ip.replace('.', '_').replace('/', '_')}[\"{source_name}\"]")
-                        mermaid.append(f"    CIDR_{cidr_ip.replace('.', '_').replace('/', '_')} -->|\"{protocol} {port_range}\"| SG_{sg_name}")
-                
-                # Check for security group references
-                for user_id_group_pair in rule.get('UserIdGroupPairs', []):
-                    referenced_sg = user_id_group_pair.get('GroupId')
-                    if referenced_sg and referenced_sg in self.security_groups:
-                        ref_name = referenced_sg.replace('-', '_')
-                        # Get source component name
-                        source_components = self._get_component_name(referenced_sg)
-                        source_label = f"{port_range}"
-                        if source_components:
-                            source_label = f"{source_components}<br/>{port_range}"
-                        mermaid.append(f"    SG_{ref_name} -->|\"{source_label}\"| SG_{sg_name}")
+        yield "    %% Security Group References"
+        for edge in self._sg_edges:
+            yield _EDGE % edge
+        
+        # Add connections to and from CIDR blocks, emitting each distinct edge
+        # once and declaring each CIDR node only the first time it appears
+        yield "    %% CIDR Sources and Destinations"
+        seen_edges = set()
+        declared_cidrs = set()
+        cidr_nodes = {}  # CIDR -> node ID, so each distinct CIDR is translated once
+        for sg_id in self.security_groups:
+            sg_node = self._sg_node[sg_id]
             
-            # Check egress rules for SG references and CIDR blocks
-            for rule in sg.get('IpPermissionsEgress', []):
-                port_range = self._format_port_range(rule)
-                protocol = rule.get('IpProtocol', '-1')
-                
-                # Check for CIDR blocks (Internet/User)
-                for cidr in rule.get('IpRanges', []):
-                    cidr_ip = cidr.get('CidrIp', '')
-                    if self._is_internet_cidr(cidr_ip):
-                        mermaid.append(f"    SG_{sg_name} -->|\"{protocol} {port_range}\"| Internet")
-                    else:
-                        # Specific CIDR - show as destination
-                        dest_name = f"CIDR: {cidr_ip}"
-                        mermaid.append(f"    CIDR_{cidr_ip.replace('.', '_').replace('/', '_')}[\"{dest_name}\"]")
-                        mermaid.append(f"    SG_{sg_name} -->|\"{protocol} {port_range}\"| CIDR_{cidr_ip.replace('.', '_').replace('/', '_')}")
-                
-                # Check for security group references
-                for user_id_group_pair in rule.get('UserIdGroupPairs', []):
-                    referenced_sg = user_id_group_pair.get('GroupId')
-                    if referenced_sg and referenced_sg in self.security_groups:
-                        ref_name = referenced_sg.replace('-', '_')
-                        # Get destination component name
-                        dest_components = self._get_component_name(referenced_sg)
-                        dest_label = f"{port_range}"
-                        if dest_components:
-                            dest_label = f"{dest_components}<br/>{port_range}"
-                        mermaid.append(f"    SG_{sg_name} -->|\"{dest_label}\"| SG_{ref_name}")
-        
-        mermaid.append("```")
-        return "\n".join(mermaid)
-    
-    def generate_nacls_diagram(self):
-        """Generate Mermaid diagram for Network ACLs"""
-        mermaid = ["```mermaid", "graph TB"]
-        
-        # Group NACLs by VPC
-        vpc_nacls = defaultdict(list)
-        for nacl_id, nacl in self.nacls.items():
-            vpc_id = nacl.get('VpcId', 'default')
-            vpc_nacls[vpc_id].append(nacl_id)
+            # Ingress CIDRs are sources, egress CIDRs are destinations
+            for cidrs, inbound in ((self._ingress_cidrs, True), (self._egress_cidrs, False)):
+                for cidr_ip, port_range, protocol in cidrs.get(sg_id, ()):
+                    # Check for CIDR blocks (Internet/User)
+                    cidr_node = cidr_nodes.get(cidr_ip)
+                    if cidr_node is None:
+                        if self._is_internet_cidr(cidr_ip):
+                            cidr_node = "Internet"
+                        else:
+                            cidr_node = "CIDR_" + cidr_ip.translate(_CIDR_TABLE)
+                        cidr_nodes[cidr_ip] = cidr_node
+                    label = f"{protocol} {port_range}"
+                    edge = (cidr_node, label, sg_node) if inbound else (sg_node, label, cidr_node)
+                    if edge in seen_edges:
+                        continue
+                    seen_edges.add(edge)
+                    
+                    if cidr_node != "Internet" and cidr_node not in declared_cidrs:
+                        declared_cidrs.add(cidr_node)
+                        yield _CIDR_NODE % (cidr_node, cidr_ip)
+                    yield _EDGE % edge
         
-        # Create nodes for each VPC
-        for vpc_id, nacl_ids in vpc_nacls.items():
-            vpc_name = self.vpcs.get(vpc_id, {}).get('Tags', [{}])[0].get('Value', vpc_id) if vpc_id in self.vpcs else vpc_id
-            mermaid.append(f"    subgraph VPC_{vpc_id.replace('-', '_')}[\"VPC: {vpc_name}\"]")
+        yield "```"
+    
+    def generate_nacls_diagram(self, out=None):
+        """Generate Mermaid diagram for Network ACLs, streamed to out if given, else returned"""
+        return _emit(self._iter_nacls_diagram(), out)
+    
+    def _iter_nacls_diagram(self):
+        """Yield the Network ACLs diagram one line (or VPC subgraph block) at a time"""
+        yield "```mermaid"
+        yield "graph TB"
+        
+        # Create nodes for each VPC, yielding each subgraph as a single block
+        for vpc_id, nacl_ids in self._vpc_nacls.items():
+            block = [self._vpc_subgraph[vpc_id]]
             
             for nacl_id in nacl_ids:
                 nacl = self.nacls[nacl_id]
                 nacl_name = "Default" if nacl.get('IsDefault', False) else nacl_id
                 
-                # Count rules
-                ingress_rules = [r for r in nacl.get('Entries', []) if not r.get('Egress', False)]
-                egress_rules = [r for r in nacl.get('Entries', []) if r.get('Egress', False)]
-                
-                mermaid.append(f"        NACL_{nacl_id.replace('-', '_')}[\"NACL: {nacl_name}<br/>{nacl_id}<br/>Ingress: {len(ingress_rules)} | Egress: {len(egress_rules)}\"]")
+                ingress, egress = self._nacl_partitions[nacl_id]
+                block.append(_NACL_NODE % (self._safe_id[nacl_id], nacl_name, nacl_id, len(ingress), len(egress)))
             
-            mermaid.append("    end")
+            block.append("    end")
+            yield "\n".join(block)
         
-        mermaid.append("```")
-        return "\n".join(mermaid)
+        yield "```"
     
-    def generate_sequence_diagram(self, source_sg_id=None, target_sg_id=None):
-        """Generate Mermaid sequence diagram showing traffic flow"""
-        mermaid = ["```mermaid", "sequenceDiagram"]
-        
+    def generate_sequence_diagram(self, source_sg_id=None, target_sg_id=None, out=None):
+        """Generate Mermaid sequence diagram showing traffic flow, streamed to out if given, else returned"""
+        return _emit(self._iter_sequence_diagram(source_sg_id, target_sg_id), out)
+    
+    def _iter_sequence_diagram(self, source_sg_id=None, target_sg_id=None):
+        """Yield the sequence diagram one line at a time"""
         if source_sg_id and target_sg_id:
-            # Specific flow diagram
             source_sg = self.security_groups.get(source_sg_id)
             target_sg = self.security_groups.get(target_sg_id)
-            
             if not source_sg or not target_sg:
-                return "Error: Security groups not found"
-            
-            source_sg_name = source_sg.get('GroupName', source_sg_id)
-            target_sg_name = target_sg.get('GroupName', target_sg_id)
+                yield "Error: Security groups not found"
+                return
+        
+        yield "```mermaid"
+        yield "sequenceDiagram"
+        
+        if source_sg_id and target_sg_id:
+            # Specific flow diagram
+            source_sg_name = self._sg_name[source_sg_id]
+            target_sg_name = self._sg_name[target_sg_id]
             
             # Get component names
-            source_components = self._get_component_name(source_sg_id)
-            target_components = self._get_component_name(target_sg_id)
-            
-            source_label = f"{source_sg_name}<br/>{source_sg_id}"
-            if source_components:
-                source_label = f"{source_sg_name}<br/>{source_sg_id}<br/>({source_components})"
+            source_components = self._component_names.get(source_sg_id)
+            target_components = self._component_names.get(target_sg_id)
             
-            target_label = f"{target_sg_name}<br/>{target_sg_id}"
-            if target_components:
-                target_label = f"{target_sg_name}<br/>{target_sg_id}<br/>({target_components})"
+            # Name, ID and (components) when there are any, built in one join
+            source_label = "<br/>".join(filter(None, (
+                source_sg_name, source_sg_id, source_components and f"({source_components})")))
+            target_label = "<br/>".join(filter(None, (
+                target_sg_name, target_sg_id, target_components and f"({target_components})")))
             
-            mermaid.append(f"    participant Source as \"{source_label}\"")
-            mermaid.append(f"    participant Target as \"{target_label}\"")
-            mermaid.append("")
+            yield f"    participant Source as \"{source_label}\""
+            yield f"    participant Target as \"{target_label}\""
+            yield ""
             
-            # Check if source can reach target
-            can_reach = False
+            # Check if source can reach target, emitting each distinct path once
+            found_edges = set()
             for rule in target_sg.get('IpPermissions', []):
-                port_range = self._format_port_range(rule)
-                protocol = rule.get('IpProtocol', '-1')
+                protocol, port_range = self._format_rule(rule)
                 
                 # Check security group references
-                for user_id_group_pair in rule.get('UserIdGroupPairs', []):
-                    if user_id_group_pair.get('GroupId') == source_sg_id:
-                        mermaid.append(f"    Source->>Target: {protocol} {port_range}")
-                        can_reach = True
+                key = (protocol, port_range, 'sg')
+                if key not in found_edges and any(
+                        pair.get('GroupId') == source_sg_id for pair in rule.get('UserIdGroupPairs', [])):
+                    found_edges.add(key)
+                    yield f"    Source->>Target: {protocol} {port_range}"
                 
                 # Check CIDR blocks
-                for cidr in rule.get('IpRanges', []):
-                    cidr_ip = cidr.get('CidrIp', '')
-                    if self._is_internet_cidr(cidr_ip):
-                        mermaid.append(f"    Note over Source: Internet/User can access")
-                        mermaid.append(f"    Source->>Target: {protocol} {port_range}")
-                        can_reach = True
+                key = (protocol, port_range, 'cidr')
+                if key not in found_edges and any(
+                        self._is_internet_cidr(cidr.get('CidrIp', '')) for cidr in rule.get('IpRanges', [])):
+                    found_edges.add(key)
+                    yield f"    Note over Source: Internet/User can access"
+                    yield f"    Source->>Target: {protocol} {port_range}"
             
-            if not can_reach:
-                mermaid.append("    Source-->>Target: ❌ Blocked")
+            if not found_edges:
+                yield "    Source-->>Target: ❌ Blocked"
         else:
             # General overview with components
-            mermaid.append("    participant Internet as \"Internet/User\"")
-            mermaid.append("    participant VPC")
+            yield "    participant Internet as \"Internet/User\""
+            yield "    participant VPC"
             
             # Add security groups with component info
-            for sg_id, sg in list(self.security_groups.items())[:10]:  # Limit to first 10 for readability
-                sg_name = sg.get('GroupName', sg_id)
-                components = self._get_component_name(sg_id)
+            for sg_id, sg_name in islice(self._sg_name.items(), _OVERVIEW_SG_LIMIT):
+                components = self._component_names.get(sg_id)
                 label = f"{sg_name}"
                 if components:
                     label = f"{sg_name}<br/>({components})"
-                mermaid.append(f"    participant SG_{sg_id.replace('-', '_')} as \"{label}\"")
+                yield f"    participant {self._sg_node[sg_id]} as \"{label}\""
             
-            mermaid.append("")
-            mermaid.append("    Internet->>VPC: Traffic")
-            mermaid.append("    VPC->>SG_*: Filtered by Security Groups")
-        
-        mermaid.append("```")
-        return "\n".join(mermaid)
-    
-    def generate_detailed_security_report(self):
-        """Generate detailed security report with Mermaid diagrams"""
-        report = []
-        report.append("# AWS Security Groups and NACLs Visualization")
-        report.append(f"\nGenerated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        report.append(f"Region: {self.region}")
-        report.append(f"\n## Summary")
-        report.append(f"- VPCs: {len(self.vpcs)}")
-        report.append(f"- Security Groups: {len(self.security_groups)}")
-        report.append(f"- Network ACLs: {len(self.nacls)}")
+            yield ""
+            yield "    Internet->>VPC: Traffic"
+            yield "    VPC->>SG_*: Filtered by Security Groups"
+        
+        yield "```"
+    
+    def generate_detailed_security_report(self, out=None):
+        """Generate detailed security report with Mermaid diagrams, streamed to out if given, else returned"""
+        return _emit(self._iter_report(), out)
+    
+    def _iter_report(self):
+        """Yield the detailed security report one line (or header block) at a time"""
+        yield ("# AWS Security Groups and NACLs Visualization\n"
+               f"\nGenerated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+               f"Region: {self.region}\n"
+               "\n## Summary\n"
+               f"- VPCs: {len(self.vpcs)}\n"
+               f"- Security Groups: {len(self.security_groups)}\n"
+               f"- Network ACLs: {len(self.nacls)}")
         
         # Security Groups Diagram
-        report.append("\n## Security Groups Overview")
-        report.append(self.generate_security_groups_diagram())
+        yield "\n## Security Groups Overview"
+        yield from self._iter_security_groups_diagram()
         
         # NACLs Diagram
-        report.append("\n## Network ACLs Overview")
-        report.append(self.generate_nacls_diagram())
+        yield "\n## Network ACLs Overview"
+        yield from self._iter_nacls_diagram()
         
-        # Detailed Security Groups
-        report.append("\n## Security Groups Details")
+        # Detailed Security Groups; bind hot lookups locally for the per-rule loops
+        get_sg_name = self._sg_name.get
+        get_component_name = self._component_names.get
+        format_rule = self._format_rule
+        is_internet_cidr = self._is_internet_cidr
+        
+        yield "\n## Security Groups Details"
         for sg_id, sg in self.security_groups.items():
             sg_name = sg.get('GroupName', 'N/A')
             vpc_id = sg.get('VpcId', 'N/A')
             description = sg.get('Description', 'N/A')
             
-            report.append(f"\n### {sg_name} ({sg_id})")
-            report.append(f"- VPC: {vpc_id}")
-            report.append(f"- Description: {description}")
+            yield (f"\n### {sg_name} ({sg_id})\n"
+                   f"- VPC: {vpc_id}\n"
+                   f"- Description: {description}")
             
             # Attached Components
-            components = self._get_component_name(sg_id)
+            components = get_component_name(sg_id)
             if components:
-                report.append(f"\n**Attached Components:**")
-                report.append(f"  - {components}")
+                yield f"\n**Attached Components:**\n  - {components}"
             
             # Ingress Rules
-            report.append("\n**Ingress Rules:**")
+            yield "\n**Ingress Rules:**"
             for rule in sg.get('IpPermissions', []):
-                protocol = rule.get('IpProtocol', '-1')
-                port_range = self._format_port_range(rule)
+                protocol, port_range = format_rule(rule)
                 
                 # CIDR blocks
                 for cidr in rule.get('IpRanges', []):
                     cidr_ip = cidr.get('CidrIp', 'N/A')
-                    source_name = "Internet/User" if self._is_internet_cidr(cidr_ip) else cidr_ip
-                    report.append(f"  - Allow {protocol} {port_range} from {source_name}")
+                    source_name = "Internet/User" if is_internet_cidr(cidr_ip) else cidr_ip
+                    yield f"  - Allow {protocol} {port_range} from {source_name}"
                 
                 # Security Group references
                 for sg_ref in rule.get('UserIdGroupPairs', []):
                     ref_sg_id = sg_ref.get('GroupId', 'N/A')
-                    ref_sg_name = self.security_groups.get(ref_sg_id, {}).get('GroupName', ref_sg_id) if ref_sg_id in self.security_groups else ref_sg_id
-                    ref_components = self._get_component_name(ref_sg_id)
-                    source_info = f"SG: {ref_sg_name} ({ref_sg_id})"
-                    if ref_components:
-                        source_info += f" - {ref_components}"
-                    report.append(f"  - Allow {protocol} {port_range} from {source_info}")
+                    ref_sg_name = get_sg_name(ref_sg_id, ref_sg_id)
+                    ref_components = get_component_name(ref_sg_id)
+                    source_info = " - ".join(filter(None, (f"SG: {ref_sg_name} ({ref_sg_id})", ref_components)))
+                    yield f"  - Allow {protocol} {port_range} from {source_info}"
             
             # Egress Rules
-            report.append("\n**Egress Rules:**")
+            yield "\n**Egress Rules:**"
             for rule in sg.get('IpPermissionsEgress', []):
-                protocol = rule.get('IpProtocol', '-1')
-                port_range = self._format_port_range(rule)
+                protocol, port_range = format_rule(rule)
                 
                 for cidr in rule.get('IpRanges', []):
                     cidr_ip = cidr.get('CidrIp', 'N/A')
-                    dest_name = "Internet/User" if self._is_internet_cidr(cidr_ip) else cidr_ip
-                    report.append(f"  - Allow {protocol} {port_range} to {dest_name}")
+                    dest_name = "Internet/User" if is_internet_cidr(cidr_ip) else cidr_ip
+                    yield f"  - Allow {protocol} {port_range} to {dest_name}"
                 
                 for sg_ref in rule.get('UserIdGroupPairs', []):
                     ref_sg_id = sg_ref.get('GroupId', 'N/A')
-                    ref_sg_name = self.security_groups.get(ref_sg_id, {}).get('GroupName', ref_sg_id) if ref_sg_id in self.security_groups else ref_sg_id
-                    ref_components = self._get_component_name(ref_sg_id)
-                    dest_info = f"SG: {ref_sg_name} ({ref_sg_id})"
-                    if ref_components:
-                        dest_info += f" - {ref_components}"
-                    report.append(f"  - Allow {protocol} {port_range} to {dest_info}")
+                    ref_sg_name = get_sg_name(ref_sg_id, ref_sg_id)
+                    ref_components = get_component_name(ref_sg_id)
+                    dest_info = " - ".join(filter(None, (f"SG: {ref_sg_name} ({ref_sg_id})", ref_components)))
+                    yield f"  - Allow {protocol} {port_range} to {dest_info}"
         
         # NACLs Details
-        report.append("\n## Network ACLs Details")
+        yield "\n## Network ACLs Details"
+        format_nacl_port_range = self._format_nacl_port_range
         for nacl_id, nacl in self.nacls.items():
             vpc_id = nacl.get('VpcId', 'N/A')
             is_default = nacl.get('IsDefault', False)
             nacl_name = "Default NACL" if is_default else nacl_id
             
-            report.append(f"\n### {nacl_name} ({nacl_id})")
-            report.append(f"- VPC: {vpc_id}")
-            report.append(f"- Default: {is_default}")
-            
-            # Ingress Rules
-            ingress_rules = sorted([r for r in nacl.get('Entries', []) if not r.get('Egress', False)], 
-                                 key=lambda x: x.get('RuleNumber', 0))
-            report.append("\n**Ingress Rules:**")
-            for rule in ingress_rules:
-                rule_num = rule.get('RuleNumber', 'N/A')
-                protocol = rule.get('Protocol', '-1')
-                action = "ALLOW" if rule.get('RuleAction') == 'allow' else "DENY"
-                cidr = rule.get('CidrBlock', 'N/A')
-                port_range = self._format_nacl_port_range(rule)
-                report.append(f"  - Rule {rule_num}: {action} {protocol} {port_range} from {cidr}")
+            yield (f"\n### {nacl_name} ({nacl_id})\n"
+                   f"- VPC: {vpc_id}\n"
+                   f"- Default: {is_default}")
             
-            # Egress Rules
-            egress_rules = sorted([r for r in nacl.get('Entries', []) if r.get('Egress', False)], 
-                                 key=lambda x: x.get('RuleNumber', 0))
-            report.append("\n**Egress Rules:**")
-            for rule in egress_rules:
-                rule_num = rule.get('RuleNumber', 'N/A')
-                protocol = rule.get('Protocol', '-1')
-                action = "ALLOW" if rule.get('RuleAction') == 'allow' else "DENY"
-                cidr = rule.get('CidrBlock', 'N/A')
-                port_range = self._format_nacl_port_range(rule)
-                report.append(f"  - Rule {rule_num}: {action} {protocol} {port_range} to {cidr}")
-        
-        return "\n".join(report)
-    
-    def _format_port_range(self, rule):
-        """Format port range for display"""
+            # Ingress and egress halves come pre-sorted from the partition cache
+            ingress_rules, egress_rules = self._nacl_partitions[nacl_id]
+            for heading, rules, direction in (("Ingress", ingress_rules, "from"), ("Egress", egress_rules, "to")):
+                yield f"\n**{heading} Rules:**"
+                for rule in rules:
+                    rule_num = rule.get('RuleNumber', 'N/A')
+                    protocol = rule.get('Protocol', '-1')
+                    action = "ALLOW" if rule.get('RuleAction') == 'allow' else "DENY"
+                    cidr = rule.get('CidrBlock', 'N/A')
+                    port_range = format_nacl_port_range(rule)
+                    yield f"  - Rule {rule_num}: {action} {protocol} {port_range} {direction} {cidr}"
+    
+    def _partition_nacl_entries(self, nacl):
+        """Split NACL entries into (ingress, egress) lists sorted by rule number"""
+        ingress, egress = [], []
+        for entry in nacl.get('Entries', []):
+            (egress if entry.get('Egress', False) else ingress).append(entry)
+        ingress.sort(key=_RULE_NUMBER)
+        egress.sort(key=_RULE_NUMBER)
+        return ingress, egress
+    
+    def _format_rule(self, rule):
+        """Return a rule's (protocol, display port range), reading IpProtocol only once"""
         protocol = rule.get('IpProtocol', '-1')
-        if protocol == '-1':
-            return "All Ports"
-        
-        from_port = rule.get('FromPort')
-        to_port = rule.get('ToPort')
-        
-        if from_port is None or to_port is None:
-            return "All Ports"
-        
-        if from_port == to_port:
-            return f"Port {from_port}"
-        else:
-            return f"Ports {from_port}-{to_port}"
+        return protocol, _fmt_sg_ports(protocol, rule.get('FromPort'), rule.get('ToPort'))
     
     def _format_nacl_port_range(self, rule):
         """Format port range for NACL display"""
-        port_range = rule.get('PortRange', {})
+        port_range = rule.get('PortRange')
         if not port_range:
             return "All Ports"
-        
-        from_port = port_range.get('From')
-        to_port = port_range.get('To')
-        
-        if from_port is None or to_port is None:
-            return "All Ports"
-        
-        if from_port == to_port:
-            return f"Port {from_port}"
-        else:
-            return f"Ports {from_port}-{to_port}"
+        return _fmt_port_pair(port_range.get('From'), port_range.get('To'))
+
+
+def _fetch(visualizer, args):
+    """Fetch the data the requested output needs"""
+    if args.source_sg and args.target_sg:
+        visualizer.fetch_flow_data(args.source_sg, args.target_sg)
+    else:
+        visualizer.fetch_all_data()
+    return visualizer
+
+
+def _write_output(visualizer, args, out):
+    """Write the requested output for a fetched visualizer to out"""
+    if args.source_sg and args.target_sg:
+        # Generate sequence diagram for specific flow
+        visualizer.generate_sequence_diagram(args.source_sg, args.target_sg, out)
+    elif args.format == 'mermaid':
+        # Generate Mermaid diagrams only, streamed straight to out
+        out.write("# Security Groups Diagram\n")
+        visualizer.generate_security_groups_diagram(out)
+        out.write("\n# Network ACLs Diagram\n")
+        visualizer.generate_nacls_diagram(out)
+    else:
+        # Generate full report, streamed rather than joined in memory
+        visualizer.generate_detailed_security_report(out)
+
+
+def _fetch_region(visualizer, args):
+    """Fetch one region of an all-regions scan, returning None if AWS refuses it"""
+    try:
+        return _fetch(visualizer, args)
+    except _AWS_ERRORS as e:
+        # Region-deny SCPs and endpoint timeouts are routine; skip the region, keep the rest
+        visualizer.log.warning("Warning: Skipping region: %s", e)
+        return None
+
+
+def _fetch_all_regions(args):
+    """Fetch every enabled region in parallel, returning the fetched visualizers in region order"""
+    # List regions from the session's own region so GovCloud and China partitions resolve
+    ec2 = _get_client('ec2', _get_session().region_name or 'us-east-1')
+    regions = [r['RegionName'] for r in ec2.describe_regions()['Regions']]
+    
+    # Build clients up front: boto3 sessions are not thread-safe for client creation
+    visualizers = [SecurityVisualizer(region=region, cache_ttl=args.cache_ttl, max_workers=args.max_workers) for region in regions]
+    with ThreadPoolExecutor(max_workers=min(16, len(visualizers))) as executor:
+        fetched = list(executor.map(lambda v: _fetch_region(v, args), visualizers))
+    return [visualizer for visualizer in fetched if visualizer is not None]
 
 
 def main():
     parser = argparse.ArgumentParser(description='Visualize AWS Security Groups and NACLs')
-    parser.add_argument('--region', default='us-east-1', help='AWS region (default: us-east-1)')
+    parser.add_argument('--region', default='us-east-1',
+                       help="AWS region, or 'all' to scan every enabled region (default: us-east-1)")
     parser.add_argument('--output', '-o', default='security-visualization.md', 
-                       help='Output file (default: security-visualization.md)')
+                       help="Output file, or '-' for stdout (default: security-visualization.md)")
     parser.add_argument('--format', choices=['mermaid', 'report'], default='report',
                        help='Output format: mermaid (diagrams only) or report (full report)')
     parser.add_argument('--source-sg', help='Source Security Group ID for sequence diagram')
     parser.add_argument('--target-sg', help='Target Security Group ID for sequence diagram')
+    parser.add_argument('--cache-ttl', type=int, default=0, metavar='SECONDS',
+                       help='Reuse AWS responses cached under ~/.cache/aws-secviz for this many seconds (default: 0, disabled)')
+    parser.add_argument('--max-workers', type=int, default=8, metavar='N',
+                       help='Concurrent AWS calls per fetch stage (default: 8)')
+    parser.add_argument('--quiet', '-q', action='store_true',
+                       help='Only print warnings and errors')
+    parser.add_argument('--debug', action='store_true',
+                       help='Print a traceback on unexpected errors')
     
     args = parser.parse_args()
+    if bool(args.source_sg) != bool(args.target_sg):
+        parser.error("--source-sg and --target-sg must be provided together")
+    if args.region == 'all' and (args.source_sg or args.target_sg):
+        parser.error("--source-sg/--target-sg need a single --region")
+    if args.cache_ttl < 0:
+        parser.error("--cache-ttl must not be negative")
+    if args.max_workers < 1:
+        parser.error("--max-workers must be at least 1")
+    
+    # One handler for all progress output; logging serializes writes from the fetch threads.
+    # When the output itself goes to stdout, progress moves to stderr. Only our logger is
+    # configured so botocore's own INFO chatter stays on its default (silent) root setup.
+    handler = logging.StreamHandler(sys.stderr if args.output == '-' else sys.stdout)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    log.addHandler(handler)
+    log.setLevel(logging.WARNING if args.quiet else logging.INFO)
+    log.propagate = False
     
     try:
-        visualizer = SecurityVisualizer(region=args.region)
-        visualizer.fetch_all_data()
-        
-        if args.source_sg and args.target_sg:
-            # Generate sequence diagram for specific flow
-            output = visualizer.generate_sequence_diagram(args.source_sg, args.target_sg)
-        elif args.format == 'mermaid':
-            # Generate Mermaid diagrams only
-            output = []
-            output.append("# Security Groups Diagram")
-            output.append(visualizer.generate_security_groups_diagram())
-            output.append("\n# Network ACLs Diagram")
-            output.append(visualizer.generate_nacls_diagram())
-            output = "\n".join(output)
+        if args.region == 'all':
+            visualizers = _fetch_all_regions(args)
+            if not visualizers:
+                log.error("AWS error: no region could be fetched")
+                return 1
         else:
-            # Generate full report
-            output = visualizer.generate_detailed_security_report()
+            visualizers = [_fetch(SecurityVisualizer(region=args.region, cache_ttl=args.cache_ttl,
+                                                  max_workers=args.max_workers), args)]
         
-        # Write to file
-        with open(args.output, 'w', encoding='utf-8') as f:
-            f.write(output)
+        # Write to file (or stdout), one section per region when scanning them all
+        f = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', buffering=1 << 20)
+        try:
+            for visualizer in visualizers:
+                if args.region == 'all':
+                    f.write(f"# Region: {visualizer.region}\n\n")
+                _write_output(visualizer, args, f)
+                if args.region == 'all':
+                    f.write("\n")
+        finally:
+            if f is not sys.stdout:
+                f.close()
         
-        print(f"\n✓ Visualization saved to {args.output}")
-        print(f"  Format: {args.format}")
-        print(f"  Region: {args.region}")
+        log.info("\n✓ Visualization saved to %s", args.output)
+        log.info("  Format: %s", args.format)
+        log.info("  Region: %s", args.region)
         
+    except (ClientError, BotoCoreError) as e:
+        # Credentials, permissions and bad IDs: the message says it all
+        log.error("AWS error: %s", e)
+        return 1
     except Exception as e:
-        print(f"Error: {e}")
-        import traceback
-        traceback.print_exc()
+        log.error("Error: %s", e)
+        if args.debug:
+            import traceback
+            traceback.print_exc()
         return 1
     
     return 0
@@ -910,4 +1248,3 @@ def main():
 
 if __name__ == '__main__':
     exit(main())
-